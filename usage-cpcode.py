@@ -4,16 +4,24 @@ Optional parameters:
   productId:     (default M-LC-169586 = "App & API Protector with Advanced Security Management - Included delivery")
                  Easy way to find the productId is to look at the usage in billing of Akamai Control Center
                  and look at the URL, it contains the productId
-Requires python packages: requests, akamai-edgegrid, python-dotenv
+Requires python packages: requests, akamai-edgegrid, python-dotenv, orjson
 """
 import requests
+import urllib3
 import json
+import orjson
 import sys
 import csv
 import datetime
 import os
+import time
+import hashlib
+import tempfile
 import dotenv
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Iterator
 from akamai.edgegrid import EdgeGridAuth, EdgeRc
 from urllib.parse import urljoin
 
@@ -24,12 +32,40 @@ class Config:
     edgerc_path: str = os.path.expanduser(os.getenv('AKAMAI_EDGERC', '~/.edgerc'))
     edgerc_section: str = os.getenv('AKAMAI_EDGERC_SECTION', 'default')
     account_switch_key: str = os.getenv('AKAMAI_ACCOUNT_SWITCH_KEY', '')
+    cache_dir: str = os.getenv('AKAMAI_CACHE_DIR', '.cache')
+    cache_ttl: int = int(os.getenv('AKAMAI_CACHE_TTL', '86400'))
+    max_workers: int = int(os.getenv('AKAMAI_MAX_WORKERS', '8'))
 cfg = Config()
 edgerc = EdgeRc(cfg.edgerc_path)
 baseurl = 'https://%s' % edgerc.get(cfg.edgerc_section, 'host')
-sess = requests.Session()
+# Connect and read timeout for all API requests
+TIMEOUT = (5, 60)
+
+class Session(requests.Session):
+    """Session with a default timeout on every request"""
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+sess = Session()
+# Keep enough connections alive for the parallel requests, retry transient errors
+# after the retries the last response is returned and handled by checkresponse
+retries = urllib3.util.Retry(total=5, backoff_factor=0.75, status_forcelist=[429, 500, 502, 503, 504],
+                             respect_retry_after_header=True, allowed_methods=frozenset(["GET"]), raise_on_status=False)
+poolsize = max(32, cfg.max_workers)
+sess.mount('https://', requests.adapters.HTTPAdapter(pool_connections=poolsize, pool_maxsize=poolsize, max_retries=retries))
 sess.auth = EdgeGridAuth.from_edgerc(edgerc, cfg.edgerc_section)
 account = cfg.account_switch_key
+# Number of concurrent API requests, the connection pool keeps a connection alive per worker
+MAX_WORKERS = cfg.max_workers
+
+class ApiError(Exception):
+    """Raised when an Akamai API request fails"""
+    def __init__(self, response):
+        self.response = response
+        super().__init__(f"Status code: {response.status_code}\n"
+                         f"{response.request.method} {response.request.url}\n"
+                         f"Response:\n{response.text}")
 
 #Helper functions
 def akurl(p):
@@ -43,11 +79,41 @@ def akurl(p):
 def checkresponse(r):
     """Helper function to check the response of an API request"""      
     if r.status_code >= 300:
-        print(f"Status code: {r.status_code}", file=sys.stderr)
-        print(f"{r.request.method} {r.request.url}", file=sys.stderr)
-        print(f"Response:", file=sys.stderr)
-        print(r.text, file=sys.stderr)
-        sys.exit(1)
+        raise ApiError(r)
+
+def _json(r):
+    """Helper function to parse the JSON body of a response"""
+    return orjson.loads(r.content)
+
+def cachedget(url, headers=None, ttl=cfg.cache_ttl):
+    """Helper function to get an API response, cached on disk for ttl seconds (None: never expires)"""
+    key = hashlib.sha1((url + json.dumps(headers, sort_keys=True)).encode()).hexdigest()
+    path = os.path.join(cfg.cache_dir, key + ".json")
+    if os.path.exists(path) and (ttl is None or time.time() - os.path.getmtime(path) < ttl):
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+
+    result = sess.get(url, headers=headers)
+    checkresponse(result)
+    # no content is not cached, the data may not be available yet
+    if result.status_code == 204:
+        return None
+    data = _json(result)
+
+    os.makedirs(cfg.cache_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=cfg.cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(data))
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return data
+
+def stripPrefix(x, prefix):
+    """Helper function to strip an id prefix like ctr_ or grp_"""
+    return x[len(prefix):] if x and x.startswith(prefix) else x
 
 def isodate(dt: datetime.datetime) -> str:
     """Return datetime in ISO 8601 format with Zulu time (UTC)."""
@@ -55,34 +121,20 @@ def isodate(dt: datetime.datetime) -> str:
 
 def month_add(m:str, n:int) -> str:
     """Add n months to a YYYY-MM string"""
-    y, mm = m.split('-')
-    y = int(y)
-    mm = int(mm)
-    mm += n
-    while mm > 12:
-        mm -= 12
-        y += 1
-    while mm < 1:
-        mm += 12
-        y -= 1
-    return f"{y:04}-{mm:02}"
+    y, mm = map(int, m.split('-'))
+    y, mm = divmod(y * 12 + (mm - 1) + n, 12)
+    return f"{y:04}-{mm + 1:02}"
 
 #Akamai API functions and manipulation
 def listContracts():
     """List contracts"""
-    result = sess.get(akurl('/papi/v1/contracts'))
-    checkresponse(result)
-
-    contracts = result.json()
+    contracts = cachedget(akurl('/papi/v1/contracts'))
     return contracts
 
 def listCpCodes():
     """List all CpCodes of the account"""
     #this api does not provide groupid, well it does provide groupid but it is always nil
-    result = sess.get(akurl('/cprg/v1/cpcodes'))
-    checkresponse(result)
-
-    cpcodes = result.json()["cpcodes"]
+    cpcodes = cachedget(akurl('/cprg/v1/cpcodes'))["cpcodes"]
     return cpcodes
 
 def listCpCodesOfGroup(contractId, groupId):
@@ -91,74 +143,114 @@ def listCpCodesOfGroup(contractId, groupId):
         "accept": "application/json",
         "PAPI-Use-Prefixes": "false"
     }
-    result = sess.get(akurl(f'/papi/v1/cpcodes?contractId={contractId}&groupId={groupId}'),headers=headers)
-    checkresponse(result)
-    cpcodes = result.json()["cpcodes"]["items"]
+    cpcodes = cachedget(akurl(f'/papi/v1/cpcodes?contractId={contractId}&groupId={groupId}'),headers=headers)["cpcodes"]["items"]
     return cpcodes
 
 def listRepGroups():
     """List reporting groups"""
-    result = sess.get(akurl('/cprg/v1/reporting-groups'))
-    checkresponse(result)
-    repgrp = result.json()["groups"]
+    repgrp = cachedget(akurl('/cprg/v1/reporting-groups'))["groups"]
     return repgrp
 
 def createMapCpcodeRepGroup():
-    """Create a map of cpcode to reporting group"""
+    """Create a map of cpcode to reporting group names"""
     repgroups = listRepGroups()
-    repgroupMap = {}
+    repgroupMap = defaultdict(list)
     for rg in repgroups:
+        name = rg["reportingGroupName"]
         for contract in rg["contracts"]:
             for cpcode in contract["cpcodes"]:
-                cpcodeId = cpcode["cpcodeId"]
-                if cpcodeId not in repgroupMap:
-                    repgroupMap[cpcodeId] = []
-                repgroupMap[cpcodeId].append(rg)
-    return repgroupMap
-
-def rootContract(group, groups):
-    if "parentGroupId" in group:
-        for x in groups:
-            if x["groupId"] == group["parentGroupId"]:
-                return rootContract(x, groups)
-
-    for contractId in group["contractIds"]:
-        x = contractId[4:]
-        if x in group["groupName"]:
-            return contractId
-    return None
-
-def groupPath(groupId, groups):
-    for g in groups:
-        if g["groupId"] == groupId:
-            if "parentGroupId" in g:
-                return groupPath(g["parentGroupId"], groups) + [g["groupName"]]
-            else:
-                return [g["groupName"]]
-    return [] 
+                names = repgroupMap[cpcode["cpcodeId"]]
+                # a cpcode can be in the same reporting group through multiple contracts
+                if name not in names:
+                    names.append(name)
+    return dict(repgroupMap)
+
+def rootContract(group, byId, cache):
+    """Contract of the root group, memoized per groupId in cache"""
+    groupId = group["groupId"]
+    if groupId in cache:
+        return cache[groupId]
+
+    # Walk up to the root group
+    chain = [group]
+    while "parentGroupId" in chain[-1] and chain[-1]["parentGroupId"] in byId:
+        parentId = chain[-1]["parentGroupId"]
+        if parentId in cache:
+            break
+        chain.append(byId[parentId])
+
+    top = chain[-1]
+    if "parentGroupId" in top and top["parentGroupId"] in cache:
+        contract = cache[top["parentGroupId"]]
+    else:
+        contract = None
+        for contractId in top["contractIds"]:
+            x = contractId[4:]
+            if x in top["groupName"]:
+                contract = contractId
+                break
+
+    for g in chain:
+        cache[g["groupId"]] = contract
+    return contract
+
+def groupPath(groupId, byId, cache):
+    """Names from the root group down to groupId, memoized per groupId in cache"""
+    if groupId in cache:
+        return cache[groupId]
+
+    # Walk up until a cached or root group is found
+    chain = []
+    gid = groupId
+    while gid in byId and gid not in cache:
+        chain.append(byId[gid])
+        gid = byId[gid].get("parentGroupId")
+
+    path = cache.get(gid, [])
+    for g in reversed(chain):
+        path = path + [g["groupName"]]
+        cache[g["groupId"]] = path
+    return cache.get(groupId, [])
 
 def listAccountGroups():
     """List policies using a specific prefix"""
-    result = sess.get(akurl('/papi/v1/groups'))    
-    checkresponse(result)   
-
-    groups = result.json()["groups"]["items"]
+    groups = cachedget(akurl('/papi/v1/groups'))["groups"]["items"]
+    byId = {g["groupId"]: g for g in groups}
+    contractCache = {}
+    pathCache = {}
     for group in groups:
-        group["contractId"] = rootContract(group, groups)
-        group["path"] = groupPath(group["groupId"], groups)
+        group["contractId"] = rootContract(group, byId, contractCache)
+        group["path"] = groupPath(group["groupId"], byId, pathCache)
+        group["groupIdNum"] = int(stripPrefix(group["groupId"], "grp_"))
+        group["contractIdShort"] = stripPrefix(group["contractId"], "ctr_")
     return groups
 
+def createMapCpcodeAccGroup(accountGroups):
+    """Create a map of cpcode to the account groups it is linked to"""
+    # the cpcode listing does not provide the groupId, fetch the cpcodes of all groups in parallel
+    accgroupMap = {}
+    groupRequests = [(grp["contractIdShort"], grp["groupId"]) for grp in accountGroups]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        cpcodesOfGroups = list(executor.map(lambda g: listCpCodesOfGroup(*g), groupRequests))
+
+    for grp, cpcodesOfGroup in zip(accountGroups, cpcodesOfGroups):
+        groupId = grp["groupIdNum"]
+        for cpi in cpcodesOfGroup:
+            cpcodeId = int(cpi["cpcodeId"])
+            if cpcodeId in accgroupMap:
+                accgroupMap[cpcodeId].append(groupId)
+            else:
+                accgroupMap[cpcodeId] = [groupId]
+    return accgroupMap
+
 def getUsageByCpCode(contractId, productId, start, end=None):
     """Get usage by CP code"""
     if end is None:
         end = month_add(start, 1)
     r = f'/billing/v1/contracts/{contractId}/products/{productId}/usage/by-cp-code/monthly-summary?start={start}&end={end}'
-    result = sess.get(akurl(r))
-    checkresponse(result)
-    if result.status_code == 204:
-        return 
-    
-    return result.json()
+    # usage of a month is final once the following month has passed as well
+    ttl = None if end < datetime.datetime.now().strftime('%Y-%m') else cfg.cache_ttl
+    return cachedget(akurl(r), ttl=ttl)
 
 def getCpStatistics(contract, product, month):
     """Get CP stats for a specific contract, product and month"""
@@ -168,115 +260,102 @@ def getCpStatistics(contract, product, month):
 
         for u in usage["usagePeriods"]:
             for stat in u["cpCodeStats"]:
-                gb = None
-                hits = None
-                for s in stat["stats"]:
-                    if s["statType"] == "Bytes":
-                        gb = s["value"]
-                    elif s["statType"] == "Hits":
-                        hits = s["value"]
-
+                s = {x["statType"]: x["value"] for x in stat["stats"]}
                 stats.append({
                     "cpcode": stat["cpCode"],
-                    "hits": hits,
-                    "gb": gb
+                    "hits": s.get("Hits"),
+                    "gb": s.get("Bytes")
                 })
     return stats
 
 DELIVERY_PRODUCTS = ["Site_Accel::Site_Accel"]
-def cptrafficPerMonth(productId:str, month:str, includeNoTraffic:bool=False):
+def cptrafficPerMonth(productId:str, month:str, includeNoTraffic:bool=False) -> Iterator[dict]:
+    """Yield the traffic per cpcode, in contract order once the statistics of each contract are available"""
     contracts = listContracts()
     contractMap = {}
-    for cpcodeId in contracts["contracts"]["items"]:
-        contractMap[cpcodeId["contractId"]] = cpcodeId
+    for contract in contracts["contracts"]["items"]:
+        contract["contractIdShort"] = stripPrefix(contract["contractId"], "ctr_")
+        contractMap[contract["contractId"]] = contract
 
     cpcodes = listCpCodes()
     cpcodeMap = {}
     for cpcode in cpcodes:
+        cpcode["contractIdShort"] = stripPrefix(cpcode["accessGroup"]["contractId"], "ctr_")
         cpcodeMap[cpcode["cpcodeId"]] = cpcode
 
-    # Create a map of cpcode to groups it is linked to
-    mapCpcodeAccgroup = {}
     accountGroups = listAccountGroups()
     groupmap = {}
     for grp in accountGroups:
-        groupId = int(grp["groupId"].replace("grp_",""))
-        groupmap[groupId] = grp
-        contractId = grp["contractId"].replace("ctr_", "")
-        cpcodesOfGroup = listCpCodesOfGroup(contractId, grp["groupId"])    
-        for cpi in cpcodesOfGroup:
-            cpcodeId = int(cpi["cpcodeId"])
-            if cpcodeId in mapCpcodeAccgroup:
-                mapCpcodeAccgroup[cpcodeId].append(groupId)
-            else:
-                mapCpcodeAccgroup[cpcodeId] = [groupId]
+        groupmap[grp["groupIdNum"]] = grp
+
+    # Create a map of cpcode to groups it is linked to
+    mapCpcodeAccgroup = createMapCpcodeAccGroup(accountGroups)
+
+    # only use the first level groups
+    firstLevelName = {gid: g["path"][1] for gid, g in groupmap.items() if len(g["path"]) == 2}
+    #if you want the full path use this
+    #firstLevelName = {gid: "/".join(g["path"][1:]) for gid, g in groupmap.items()}
+    groupPathCache = {}
+    def cpcodeGroupPath(cpcodeId):
+        """First level group names of a cpcode, cached per set of groups"""
+        groupIds = tuple(mapCpcodeAccgroup.get(cpcodeId, ()))
+        if groupIds not in groupPathCache:
+            groupPathCache[groupIds] = [firstLevelName[gid] for gid in groupIds if gid in firstLevelName]
+        return groupPathCache[groupIds]
 
     mapCpcodeRepgroup = createMapCpcodeRepGroup()
 
-    traffic = []
+    def buildRow(cpcodeId, cpcode, cpstat=None):
+        """Traffic row of a cpcode, without hits and gb when there are no statistics"""
+        row = dict(contract=cpcode["contractIdShort"], cpcode=cpcodeId, name=cpcode["cpcodeName"],
+                   groupPath=cpcodeGroupPath(cpcodeId), repGroups=mapCpcodeRepgroup.get(cpcodeId, []))
+        if cpstat is not None:
+            row["hits"] = cpstat["hits"]
+            row["gb"] = cpstat["gb"]
+        return row
+
+    # The billing api has no multi contract call, request the usage of all contracts in parallel
     addedCpCodes = set()
-    for contract in contractMap:
-        cpstats = getCpStatistics(contract.replace("ctr_", ""), productId, month)   
-        for cpstat in cpstats:
-            cpcodeId = cpstat["cpcode"] 
-            contractId = cpcodeMap[cpcodeId]["accessGroup"]["contractId"].replace("ctr_", "")
-            # eror in api, groupId is always null
-            #groupId = cpcodeMap[cpcode]["accessGroup"]["groupId"]
-            groupId = mapCpcodeAccgroup[cpcodeId]
-            groupPath = []
-            for gid in groupId:
-                #only use the first level groups
-                if len(groupmap[gid]["path"]) == 2: 
-                    groupPath.append(groupmap[gid]["path"][1])
-                    #if you want the full path use this
-                    #groupPath.append("/".join(groupmap[gid]["path"][1:]) if gid in groupmap else f'nf:{gid}')
-
-            repgroupnames = []
-            if cpcodeId in mapCpcodeRepgroup:
-                repgroupnames = [r["reportingGroupName"] for r in mapCpcodeRepgroup[cpcodeId]]
-    
-            traffic.append(dict(contract=contractId, cpcode=cpcodeId, name=cpcodeMap[cpcodeId]["cpcodeName"], groupPath=groupPath, 
-                                repGroups=repgroupnames,
-                                hits=cpstat["hits"], gb=cpstat["gb"]))
-        addedCpCodes.add(cpcodeId)   
-    # Add cpcodes that have no traffic
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # rows are yielded in contract order once the statistics of each contract are available
+        for cpstats in executor.map(lambda c: getCpStatistics(c["contractIdShort"], productId, month), contractMap.values()):
+            for cpstat in cpstats:
+                cpcodeId = cpstat["cpcode"]
+                yield buildRow(cpcodeId, cpcodeMap[cpcodeId], cpstat)
+                addedCpCodes.add(cpcodeId)
 
+    # Add cpcodes that have no traffic
     if includeNoTraffic:
-        for cpcodeId, cpcode in cpcodeMap.items():
-            if cpcodeId not in addedCpCodes:
-                validContract = False
-                contractId = cpcode["accessGroup"]["contractId"].replace("ctr_", "")
-                for contract in cpcode["contracts"]:
-                    if contract["status"] == "ongoing":
-                        validContract = True
-                        break
-                if not validContract:
-                    continue
-
-                validProduct = False
-                for product in cpcode["products"]:
-                    if product["productId"] in DELIVERY_PRODUCTS:
-                        validProduct = True
-                        break
-                if not validProduct:
-                    continue
-                        
-            
-                groupId = mapCpcodeAccgroup[cpcodeId]
-                groupPath = []
-                for gid in groupId:
-                    #only use the first level groups
-                    if len(groupmap[gid]["path"]) == 2: 
-                        groupPath.append(groupmap[gid]["path"][1])
-
-                repgroupnames = []
-                if cpcodeId in mapCpcodeRepgroup:
-                    repgroupnames = [r["reportingGroupName"] for r in mapCpcodeRepgroup[cpcodeId]]
-
-                traffic.append(dict(contract=contractId, cpcode=cpcodeId, name=cpcode["cpcodeName"], groupPath=groupPath,
-                                    repGroups=repgroupnames))
-            addedCpCodes.add(cpcodeId)
-    return traffic
+        eligible = {cpcodeId: cpcode for cpcodeId, cpcode in cpcodeMap.items()
+                    if cpcodeId not in addedCpCodes
+                    and any(c["status"] == "ongoing" for c in cpcode["contracts"])
+                    and any(p["productId"] in DELIVERY_PRODUCTS for p in cpcode["products"])}
+        for cpcodeId, cpcode in eligible.items():
+            yield buildRow(cpcodeId, cpcode)
+
+def writeTraffic(filename, productId, month, sumRepGroups):
+    """Write the traffic CSV and sum the traffic per reporting group"""
+    # large buffer, the rows are written one at a time
+    with open(filename, "w", newline='', buffering=1 << 20) as csvfile:
+        fieldnames = ["contract", "cpcode", "name", "groupPath", "repGroups", "hits", "gb"]
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+
+        writer.writeheader()
+        for row in cptrafficPerMonth(productId, month, includeNoTraffic=True):
+            repGroups = row["repGroups"]
+            writer.writerow({**row, "groupPath": ";".join(row["groupPath"]), "repGroups": ";".join(repGroups)})
+
+            hits = row.get("hits") or 0
+            gb = row.get("gb") or 0.0
+            for rg in repGroups or ["#None"]:
+                sumRepGroups[rg]["hits"] += hits
+                sumRepGroups[rg]["gb"] += gb
+
+            # traffic of cpcodes in multiple reporting groups is counted once in the total
+            if len(repGroups) > 1:
+                n = len(repGroups) - 1
+                sumRepGroups["#Multiple"]["hits"] -= hits * n
+                sumRepGroups["#Multiple"]["gb"] -= gb * n
 
 def main():
     """Main function to run the traffic analysis"""
@@ -293,38 +372,19 @@ def main():
     if len(sys.argv) > 2:
         productId = sys.argv[2]
     
-    sumRepGroups = {}
-    x = cptrafficPerMonth(productId, month, includeNoTraffic=True)
-    with open(f"traffic_{month}.csv", "w", newline='') as csvfile:
-        fieldnames = ["contract", "cpcode", "name", "groupPath", "repGroups", "hits", "gb"]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for row in x:
-            frow = {**row, "groupPath": ";".join(row["groupPath"]), "repGroups": ";".join(row["repGroups"])}
-            writer.writerow(frow)    
-
-            for rg in row["repGroups"]:
-                if rg not in sumRepGroups:
-                    sumRepGroups[rg] = {"hits": 0, "gb": 0}
-                sumRepGroups[rg]["hits"] += row.get("hits", 0)
-                sumRepGroups[rg]["gb"] += row.get("gb", 0.0)
-            
-            if len(row["repGroups"]) == 0:
-                if "#None" not in sumRepGroups:
-                    sumRepGroups["#None"] = {"hits": 0, "gb": 0}
-                sumRepGroups["#None"]["hits"] += row.get("hits", 0)
-                sumRepGroups["#None"]["gb"] += row.get("gb", 0.0)
-
-            if len(row["repGroups"]) > 1:
-                n = len(row["repGroups"]) - 1
-                if "#Multiple" not in sumRepGroups:
-                    sumRepGroups["#Multiple"] = {"hits": 0, "gb": 0}
-                sumRepGroups["#Multiple"]["hits"] -= row.get("hits", 0) * n
-                sumRepGroups["#Multiple"]["gb"] -= row.get("gb", 0.0)  * n          
-
-
-    print(f"Traffic for month {month} and product {productId} written to traffic_{month}.csv")
+    sumRepGroups = defaultdict(lambda: {"hits": 0, "gb": 0.0})
+    # write to a temporary file first, a failed run must not overwrite the previous output
+    outfile = f"traffic_{month}.csv"
+    tmp = f"{outfile}.tmp"
+    try:
+        writeTraffic(tmp, productId, month, sumRepGroups)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, outfile)
+
+    print(f"Traffic for month {month} and product {productId} written to {outfile}")
     print("Summary of Reporting Groups:")
     print("     Reporting Group:      MHits         GB")
     for rg in sorted(sumRepGroups.keys()):
@@ -332,4 +392,8 @@ def main():
         print(f"{rg:>20}: {stats['hits']/1_000_000:>10.2f} {stats['gb']:>10.2f}")
                 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    try:
+        main()
+    except ApiError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1) 
\ No newline at end of file